@@ -0,0 +1,200 @@
+import json
+import random
+import asyncio
+import threading
+import numpy as np
+from ioh import get_problem, ProblemClass
+
+from GeneticAlgorithm import GA
+from BatchProblem import BatchProblem, FailedFitness
+
+
+class AsyncProblem(BatchProblem):
+    """Problem that evaluates a batch of genomes concurrently with an async evaluation function
+
+    The evaluation function is a coroutine function that takes a genome and returns its fitness, e.g. a request to
+    a simulator or an HTTP service. At most `concurrency` evaluations run at the same time and the results are
+    gathered in the order of the genomes.
+
+    An evaluation that raises an exception or takes longer than `timeout` seconds is retried at most `retries` times.
+    An exception is assumed to happen before the evaluation, so it does not use budget. A timeout is assumed to have
+    used an evaluation, so it is only retried while the budget allows it. A genome that could not be evaluated gets
+    the `fallback` fitness as a FailedFitness, so it is not taken as the best genome and not cached. Only the
+    measured fitnesses reach an attached logger, so timeouts are counted in the state but not logged.
+
+    The batch is run with asyncio.run, so evaluate_batch can not be called from a running event loop."""
+
+    def __init__(self, evaluate, dimension: int, budget: int, concurrency: int = 10, timeout: float = 10,
+                 retries: int = 2, backoff: float = 0.1, fallback: float = 0):
+        """Initialize the evaluation function and its limits"""
+        super().__init__(dimension, budget, name="AsyncProblem")
+        self.evaluate = evaluate        # Coroutine function that returns the fitness of a genome
+        self.concurrency = concurrency  # Maximum number of evaluations at the same time
+        self.timeout = timeout          # Seconds before an evaluation is cancelled and retried
+        self.retries = retries          # Number of retries of a failed evaluation
+        self.backoff = backoff          # Seconds to wait before the first retry, doubled every retry
+        self.fallback = fallback        # Fitness of a genome that could not be evaluated
+        self.failures = 0               # Number of genomes that got the fallback fitness
+
+    async def __evaluate(self, genome: list, semaphore: asyncio.Semaphore, batch: dict) -> float:
+        """Function to evaluate a genome with the concurrency limit, timeout and retries
+
+        The batch keeps count of the used evaluations and of the genomes that are still pending, as long as
+        used + pending stays within the remaining budget, every pending genome can still use an evaluation"""
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    fitness = await asyncio.wait_for(self.evaluate(genome), self.timeout)
+                    batch["used"] += 1
+                    batch["pending"] -= 1
+                    return fitness
+                except asyncio.TimeoutError:
+                    # The evaluation may have been made, only retry if the budget allows another one
+                    batch["used"] += 1
+                    if batch["used"] + batch["pending"] > batch["remaining"]:
+                        break
+                except Exception:
+                    # E.g. a connection error, an error status or a malformed response
+                    pass
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+
+        batch["pending"] -= 1
+        self.failures += 1
+        return FailedFitness(self.fallback)
+
+    async def __gather(self, genomes: list, batch: dict) -> list:
+        """Function to evaluate all genomes concurrently and gather the fitnesses in order"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*[self.__evaluate(genome, semaphore, batch) for genome in genomes])
+
+    def _evaluate(self, genomes: list, remaining: int) -> tuple:
+        """Function to evaluate the genomes concurrently, returns the fitnesses and the used evaluations"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("evaluate_batch can not be called from a running event loop! -> Call it from a thread")
+
+        batch = {"used": 0, "pending": len(genomes), "remaining": remaining}
+        fitness = asyncio.run(self.__gather([[int(g) for g in genome] for genome in genomes], batch))
+        return fitness, batch["used"]
+
+
+def http_evaluator(host: str, port: int):
+    """Create a coroutine function that evaluates a genome with a POST request of {"x": genome} to the server"""
+
+    async def evaluate(genome: list) -> float:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            body = json.dumps({"x": genome}).encode()
+            writer.write(f"POST / HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+        header, _, payload = response.partition(b"\r\n\r\n")
+        status = header.split(b"\r\n")[0]
+        if b" 200 " not in status:
+            raise ConnectionError(f"The server could not evaluate the genome! -> {status.decode()}")
+        return json.loads(payload)["y"]
+
+    return evaluate
+
+
+class MockServer():
+    """Local HTTP stand-in for a slow black-box problem, runs an ioh PBO problem in a background thread
+
+    Every request waits `latency` seconds before it is answered and fails with a 500 with probability
+    `failure_rate` without evaluating, to test the concurrency, timeouts and retries of the AsyncProblem. The server
+    keeps track of the maximum number of requests it handled at the same time."""
+
+    def __init__(self, fid: int, dimension: int, latency: float = 0.05, failure_rate: float = 0, seed: int = 1,
+                 host: str = "127.0.0.1", port: int = 0):
+        """Initialize the problem of the server, a port of 0 picks a free port"""
+        self.problem = get_problem(fid, dimension=dimension, instance=1, problem_class=ProblemClass.PBO)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.active = 0         # Number of requests that are being handled
+        self.max_active = 0     # Maximum number of requests that were handled at the same time
+        self.host = host
+        self.port = port
+        self.__loop = None
+        self.__server = None
+        self.__thread = None
+
+    async def __handle(self, reader, writer):
+        """Function to answer a single request with the fitness of the posted genome"""
+        header = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in header.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        body = await reader.readexactly(length)
+
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.latency)
+        if self.random.random() < self.failure_rate:
+            status, payload = "500 Internal Server Error", b"{}"
+        else:
+            status, payload = "200 OK", json.dumps({"y": self.problem(json.loads(body)["x"])}).encode()
+        self.active -= 1
+
+        # The client may have stopped waiting because of its timeout
+        try:
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+            writer.close()
+        except ConnectionError:
+            pass
+
+    @property
+    def evaluations(self) -> int:
+        """Number of evaluations the server made"""
+        return self.problem.state.evaluations
+
+    def start(self):
+        """Function to start the server in a background thread"""
+        self.__loop = asyncio.new_event_loop()
+        self.__server = self.__loop.run_until_complete(asyncio.start_server(self.__handle, self.host, self.port))
+        self.port = self.__server.sockets[0].getsockname()[1]
+        self.__thread = threading.Thread(target=self.__loop.run_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def close(self):
+        """Function to stop the server"""
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__server.close()
+        self.__loop.run_until_complete(self.__server.wait_closed())
+        self.__loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+
+if __name__ == "__main__":
+
+    # Fixed parameters
+    budget = 1000
+    dimension = 50
+
+    # Run the GA against the slow mock server, evaluating every generation concurrently
+    np.random.seed(1)
+    with MockServer(19, dimension, latency=0.05, failure_rate=0.05) as server:
+        F19 = AsyncProblem(http_evaluator(server.host, server.port), dimension, budget, concurrency=20)
+        GA19 = GA(F19, budget, dimension)
+        GA19.setparameters(40, 'roulette wheel', 0.2, 4, 0)
+        for record in GA19.run():
+            print(record)
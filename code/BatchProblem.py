@@ -0,0 +1,79 @@
+import numpy as np
+from collections import deque
+from types import SimpleNamespace
+from ioh import wrap_problem, ProblemClass, OptimizationType
+
+
+class FailedFitness(float):
+    """Fallback fitness of a genome that could not be evaluated
+
+    It can be used as a fitness for selection, but it was never measured: it is not a candidate for the best genome
+    and should not be cached, so the genome can be evaluated again later."""
+
+
+class BatchProblem():
+    """Base class for problems that evaluate a whole batch of genomes at once
+
+    It mimics the parts of an ioh problem that the GA and ES use (calling, state, meta_data and reset) and has
+    evaluate_batch, so the GA and ES send the cache misses of a generation in one batch. Subclasses implement
+    _evaluate(genomes, remaining) which returns the fitnesses of the genomes and the number of evaluations used.
+
+    The budget is accounted here: a batch is evaluated in order until the budget is used, the remaining genomes are
+    not evaluated and get a fitness of None. A genome that could not be evaluated gets a FailedFitness.
+
+    The measured fitnesses are replayed in order through a wrapped ioh problem, so a logger attached with
+    attach_logger sees every evaluation of the batch as if the genomes were evaluated one by one."""
+
+    def __init__(self, dimension: int, budget: int, name: str = "BatchProblem"):
+        """Initialize the budget, the state and the logged problem"""
+        self.dim = dimension    # Dimension of bit strings
+        self.budget = budget    # The fixed budget, maximum number of evaluations
+        self.meta_data = SimpleNamespace(n_variables=dimension)
+
+        # The wrapped problem only hands back the fitnesses that were already measured, in order
+        replay = deque()
+        self.__replay = replay
+        self.logged = wrap_problem(lambda x: replay.popleft(), name=name, problem_class=ProblemClass.INTEGER,
+                                   dimension=dimension, optimization_type=OptimizationType.MAX, lb=0, ub=1)
+        self.reset()
+
+    def __call__(self, genome: list) -> float:
+        """Function to evaluate a single genome"""
+        return self.evaluate_batch([genome])[0]
+
+    def _evaluate(self, genomes: list, remaining: int) -> tuple:
+        """Function to evaluate the genomes, returns their fitnesses and the number of evaluations used"""
+        raise NotImplementedError("Please implement _evaluate in the subclass!")
+
+    def evaluate_batch(self, genomes: list) -> list:
+        """Function to evaluate a batch of genomes, genomes beyond the budget get a fitness of None"""
+
+        # Only evaluate as many genomes as the remaining budget allows, in the given order
+        remaining = max(self.budget - self.state.evaluations, 0)
+        n = min(len(genomes), remaining)
+        fitness = [None] * len(genomes)
+        if n == 0:
+            return fitness
+
+        fitness[:n], used = self._evaluate(genomes[:n], remaining)
+        self.state.evaluations += used
+
+        # Update the best genome and the logger in the order of the genomes, as if they were evaluated one by one
+        for genome, fit in zip(genomes[:n], fitness[:n]):
+            if fit is None or isinstance(fit, FailedFitness):
+                continue
+            if fit > self.state.current_best.y:
+                self.state.current_best = SimpleNamespace(x=list(genome), y=fit)
+            self.__replay.append(fit)
+            self.logged([int(g) for g in genome])
+
+        return fitness
+
+    def attach_logger(self, logger):
+        """Function to attach an ioh logger that sees every measured evaluation"""
+        self.logged.attach_logger(logger)
+
+    def reset(self):
+        """Function to reset the state for a new independent run"""
+        self.state = SimpleNamespace(evaluations=0, current_best=SimpleNamespace(x=None, y=-np.inf))
+        self.logged.reset()
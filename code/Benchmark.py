@@ -0,0 +1,191 @@
+import csv
+import json
+import numpy as np
+from tqdm import tqdm
+from ioh import get_problem, ProblemClass
+
+import s3490750_s3739759_ES as ES
+from GeneticAlgorithm import GA
+
+# Best tuned GA parameters (P, S, C, N, M) for every problem
+GA_PARAMETERS = {
+    18: (40, 'roulette wheel', 0.6, 2, 0),
+    19: (240, 'roulette wheel', 0.2, 4, 0),
+}
+
+
+class TrackedProblem():
+    """Thin wrapper of an ioh problem that records the trajectory of the best fitness at every improvement
+
+    Everything but calling is passed on to the problem. Only evaluations within the budget are recorded, so an
+    algorithm that overshoots the budget in its last generation gets no credit for the extra evaluations."""
+
+    def __init__(self, problem, budget: int):
+        """Initialize the wrapped problem and an empty trajectory"""
+        self.problem = problem
+        self.budget = budget
+        self.best = -np.inf
+        self.trajectory = []    # (evaluations, best fitness) pair at every improvement
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def __call__(self, genome: list) -> float:
+        """Function to evaluate a genome and record the improvement of the best fitness"""
+        fitness = self.problem(genome)
+        evaluations = self.problem.state.evaluations
+        if evaluations <= self.budget and fitness > self.best:
+            self.best = fitness
+            self.trajectory.append((evaluations, fitness))
+        return fitness
+
+    def result(self) -> list:
+        """The trajectory, ending with the best fitness at the last evaluation within the budget"""
+        return self.trajectory + [(min(self.problem.state.evaluations, self.budget), self.best)]
+
+
+def run_GA(problem, budget, dimension, fid):
+    """Run the GA with its tuned parameters and return the per-generation records"""
+    model = GA(problem, budget, dimension)
+    model.setparameters(*GA_PARAMETERS[fid])
+    return list(model.run())
+
+
+def run_ES(problem, budget, dimension, fid):
+    """Run the ES with its hyperparameters and return the per-generation records"""
+    # The ES reads its budget and dimension from module level variables, restore them for other callers
+    old_budget, old_dimension = ES.budget, ES.dimension
+    ES.budget, ES.dimension = budget, dimension
+    try:
+        return list(ES.run_ES(problem, fid))
+    finally:
+        ES.budget, ES.dimension = old_budget, old_dimension
+
+
+ALGORITHMS = {
+    "GA": run_GA,
+    "ES": run_ES,
+}
+
+
+def collect_trajectories(algorithms, fids, dimensions, seeds, budget):
+    """Run every algorithm on every problem, dimension and seed and keep the in-memory trajectories
+
+    A trajectory is a list of (evaluations, best fitness) pairs, one pair at every improvement of the best fitness
+    and a final pair at the end of the run, clipped at the budget"""
+    trajectories = []
+    for fid in fids:
+        for dimension in dimensions:
+            # No logger is attached, everything stays in memory
+            problem = get_problem(fid, dimension=dimension, instance=1, problem_class=ProblemClass.PBO)
+            for name in algorithms:
+                for seed in tqdm(seeds, desc=f"{name} F{fid} d={dimension}"):
+                    np.random.seed(seed)
+                    tracked = TrackedProblem(problem, budget)
+                    ALGORITHMS[name](tracked, budget, dimension, fid)
+                    trajectories.append({
+                        "algorithm": name,
+                        "fid": fid,
+                        "dimension": dimension,
+                        "seed": seed,
+                        "trajectory": tracked.result(),
+                    })
+                    problem.reset()
+    return trajectories
+
+
+def hitting_time(trajectory, target):
+    """Number of evaluations at which the trajectory first reaches the target, None if it never does"""
+    for evaluations, fitness in trajectory:
+        if fitness >= target:
+            return evaluations
+    return None
+
+
+def expected_running_time(trajectories, target):
+    """Expected running time: total evaluations of all runs divided by the number of runs that reached the target"""
+    evaluations = 0
+    successes = 0
+    for trajectory in trajectories:
+        hit = hitting_time(trajectory, target)
+        if hit is None:
+            evaluations += trajectory[-1][0]
+        else:
+            evaluations += hit
+            successes += 1
+
+    if successes == 0:
+        return float('inf')
+    return evaluations / successes
+
+
+def ecdf(trajectories, targets, budgets):
+    """Fraction of (run, target) pairs that are reached within every budget"""
+    hits = np.array([[hitting_time(trajectory, target) for target in targets] for trajectory in trajectories], dtype=float)
+    hits[np.isnan(hits)] = np.inf  # Targets that are never reached
+    return [float(np.mean(hits <= budget)) for budget in budgets]
+
+
+def default_targets(trajectories, n_targets=10):
+    """Evenly spaced targets between the worst and the best final fitness of all runs"""
+    final = [trajectory[-1][1] for trajectory in trajectories]
+    return list(np.linspace(min(final), max(final), n_targets))
+
+
+def report(trajectories, budget, targets=None, n_budgets=50):
+    """Compute the ERT, ECDF and area under the ECDF for every algorithm, problem and dimension
+
+    Targets are shared over the algorithms of a problem and dimension so that the results can be ranked"""
+    budgets = list(np.linspace(0, budget, n_budgets + 1)[1:])
+    rows = []
+    for fid, dimension in sorted({(t["fid"], t["dimension"]) for t in trajectories}):
+        runs = [t for t in trajectories if t["fid"] == fid and t["dimension"] == dimension]
+        problem_targets = targets if targets is not None else default_targets([t["trajectory"] for t in runs])
+        for name in sorted({t["algorithm"] for t in runs}):
+            curves = [t["trajectory"] for t in runs if t["algorithm"] == name]
+            curve = ecdf(curves, problem_targets, budgets)
+            rows.append({
+                "algorithm": name,
+                "fid": fid,
+                "dimension": dimension,
+                "runs": len(curves),
+                "targets": [float(target) for target in problem_targets],
+                "ert": [expected_running_time(curves, target) for target in problem_targets],
+                "budgets": [float(b) for b in budgets],
+                "ecdf": curve,
+                "auc": float(np.mean(curve)),
+            })
+
+    # Rank the algorithms on every problem and dimension by the area under the ECDF
+    rows.sort(key=lambda row: (row["fid"], row["dimension"], -row["auc"]))
+    return rows
+
+
+def save_report(rows, name):
+    """Save the full report as JSON and a summary with one row per target as CSV"""
+    with open(f"{name}.json", "w") as f:
+        # Infinite ERTs are stored as null to keep the file valid JSON
+        json.dump([dict(row, ert=[None if np.isinf(e) else e for e in row["ert"]]) for row in rows], f, indent=2)
+
+    with open(f"{name}.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["algorithm", "fid", "dimension", "runs", "auc", "target", "ert"])
+        for row in rows:
+            for target, ert in zip(row["targets"], row["ert"]):
+                writer.writerow([row["algorithm"], row["fid"], row["dimension"], row["runs"], row["auc"], target, ert])
+
+
+if __name__ == "__main__":
+
+    # Fixed parameters
+    budget = 5000
+    dimensions = [25, 50]
+    seeds = list(range(10))
+
+    trajectories = collect_trajectories(["GA", "ES"], [18, 19], dimensions, seeds, budget)
+    rows = report(trajectories, budget)
+    save_report(rows, "benchmark")
+
+    # Print the ranking on area under the ECDF
+    for row in rows:
+        print(f"F{row['fid']} d={row['dimension']} {row['algorithm']}: AUC {row['auc']:.3f}")
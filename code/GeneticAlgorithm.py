@@ -1,6 +1,8 @@
 import numpy as np
 from numpy.random import choice, uniform
 
+from BatchProblem import FailedFitness
+
 class GA():
     """Class for a Genetic Algorithm and all its functionalities"""
     
@@ -12,6 +14,7 @@ class GA():
         self.dim = dimension    # Dimension of bit strings
         self.cache = {}         # Cache dictionary that keeps track of fitness scores of already evaluated genomes
         self.cached = 0         # Integer that keeps count of the consecutive times the evaluation used the cache 
+        self.cache_hits = 0     # Integer that keeps count of the total times the evaluation used the cache
         self.params = False     # Boolean that is False if parameters are not set and True otherwise
         self.best_fitness = 0   # Keep track of the best fitness off all generations
         self.best_genome = None # Keep track of the genome with the best fitness off all generations
@@ -77,6 +80,7 @@ class GA():
         if genomestr in self.cache:
             fitness = self.cache[genomestr]
             self.cached += 1
+            self.cache_hits += 1
             
         # If not, add to cache and calculate fitness
         else:
@@ -86,16 +90,50 @@ class GA():
         
         return fitness
     
+    def __evaluatebatch(self, pop: list) -> list:
+        """Function to evaluate all cache misses of a population in one batch with the caching capability"""
+        genomestrs = [self.__genome2string(genome) for genome in pop]
+        
+        # Collect the unique genomes that are not in the cache yet, keeping the order of the population
+        misses = {}
+        for genomestr, genome in zip(genomestrs, pop):
+            if genomestr not in self.cache and genomestr not in misses:
+                misses[genomestr] = genome
+        
+        # Evaluate the misses in one batch and add them to the cache
+        # Genomes beyond the budget and genomes that could not be evaluated are not cached
+        results = dict(zip(misses, self.problem.evaluate_batch(list(misses.values()))))
+        for genomestr, fitness in results.items():
+            if fitness is not None and not isinstance(fitness, FailedFitness):
+                self.cache[genomestr] = fitness
+        
+        # Count the cache hits as if the genomes were evaluated one by one
+        fitness = []
+        for genomestr in genomestrs:
+            if genomestr in misses:
+                misses.pop(genomestr)
+                self.cached = 0
+            else:
+                self.cached += 1
+                self.cache_hits += 1
+            fitness.append(self.cache.get(genomestr, results.get(genomestr) or 0))
+        
+        return fitness
+    
     def __evaluategeneration(self, pop: list) -> list:
         """Function to evaluate a population of a generation"""
         
-        # Obtain a list of all fitnesses from all genomes of the population
-        fitness = [self.__evaluategenome(genome) for genome in pop]
+        # Obtain a list of all fitnesses from all genomes of the population, in one batch if the problem supports it
+        if hasattr(self.problem, 'evaluate_batch'):
+            fitness = self.__evaluatebatch(pop)
+        else:
+            fitness = [self.__evaluategenome(genome) for genome in pop]
         
-        # Check if new genome is obtained with the best fitness
-        if max(fitness) > self.best_fitness:
-            self.best_fitness = max(fitness)
-            self.best_genome = pop[fitness.index(max(fitness))]
+        # Check if new genome is obtained with the best fitness, failed evaluations were never measured
+        measured = [-np.inf if isinstance(fit, FailedFitness) else fit for fit in fitness]
+        if max(measured) > self.best_fitness:
+            self.best_fitness = max(measured)
+            self.best_genome = pop[measured.index(max(measured))]
             
         return fitness
         
@@ -221,8 +259,30 @@ class GA():
 
         return pop, fitness
 
-    def main(self):
-        """Function to perform training of the Genetic Algorithm"""
+    def __diversity(self, pop: list) -> float:
+        """Function to calculate the diversity of a population as the expected fraction of differing bits of two genomes"""
+        
+        # Frequency of 1s for every bit over the whole population
+        p = np.mean(pop, axis=0)
+        
+        return float(np.mean(2 * p * (1 - p)))
+    
+    def __record(self, gen: int, pop: list) -> dict:
+        """Function to create the lightweight record of a generation"""
+        record = {
+            "generation": gen,
+            "evaluations": self.problem.state.evaluations,
+            "best_fitness": self.best_fitness,
+            "cache_hits": self.cache_hits,
+            "diversity": self.__diversity(pop),
+        }
+        
+        return record
+
+    def run(self, target=None):
+        """Generator to perform training of the Genetic Algorithm, yields a record after every generation
+        
+        If a target fitness is given, the run stops as soon as the best fitness reaches the target"""
         
         # Check if tuneable parameters are set
         if self.params == False:
@@ -232,8 +292,17 @@ class GA():
         pop = self.__initialization()
         fitness = self.__evaluategeneration(pop)
         
-        # Generate new generations until budget is met
+        # Generate new generations until budget or target is met
         gen = 1
+        yield self.__record(gen, pop)
         while self.problem.state.evaluations < self.budget:
+            if target is not None and self.best_fitness >= target:
+                break
             pop, fitness = self.__newgeneration(pop, fitness)     
-            gen += 1
\ No newline at end of file
+            gen += 1
+            yield self.__record(gen, pop)
+
+    def main(self, target=None):
+        """Function to perform training of the Genetic Algorithm"""
+        for _ in self.run(target=target):
+            pass
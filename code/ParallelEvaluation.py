@@ -0,0 +1,100 @@
+import weakref
+import numpy as np
+from functools import partial
+from multiprocessing import Pool, cpu_count
+from multiprocessing.shared_memory import SharedMemory
+from ioh import get_problem, ProblemClass
+
+from BatchProblem import BatchProblem
+
+# State of a worker process, set once by the pool initializer
+_worker = {}
+
+
+def create_pbo_problem(fid: int, dimension: int, instance: int = 1):
+    """Create a PBO problem without logger, picklable through functools.partial for the worker processes"""
+    return get_problem(fid, dimension=dimension, instance=instance, problem_class=ProblemClass.PBO)
+
+
+def _init_worker(genomes_name, fitness_name, capacity, dimension, problem_factory):
+    """Attach a worker to the shared genome matrix and fitness vector and create its own problem"""
+    _worker["genomes_shm"] = SharedMemory(name=genomes_name)
+    _worker["fitness_shm"] = SharedMemory(name=fitness_name)
+    _worker["genomes"] = np.ndarray((capacity, dimension), dtype=np.int8, buffer=_worker["genomes_shm"].buf)
+    _worker["fitness"] = np.ndarray((capacity,), dtype=np.float64, buffer=_worker["fitness_shm"].buf)
+    _worker["problem"] = problem_factory()
+
+
+def _score_rows(rows):
+    """Score a slice of rows of the shared genome matrix and write the fitnesses into the shared vector"""
+    start, stop = rows
+    for idx in range(start, stop):
+        _worker["fitness"][idx] = _worker["problem"](_worker["genomes"][idx].tolist())
+
+
+def _release(pool, shared_memories):
+    """Stop the workers and release the shared memory, also called when a ParallelProblem is garbage collected"""
+    pool.close()
+    pool.join()
+    for shared_memory in shared_memories:
+        shared_memory.close()
+        shared_memory.unlink()
+
+
+class ParallelProblem(BatchProblem):
+    """Problem that scores a batch of genomes on a persistent pool of workers over shared memory
+
+    The genomes of a batch are written into a shared matrix and only row ranges are sent to the workers, every
+    worker evaluates its rows on its own problem created by the picklable problem factory, a PBO problem of the fid
+    by default. The scored fitnesses are replayed in order through the logged problem of the parent, so an ioh
+    logger attached with attach_logger sees one evaluation per counted evaluation."""
+
+    def __init__(self, dimension: int, budget: int, fid: int = None, problem_factory=None, capacity: int = 1000,
+                 workers: int = None):
+        """Create the shared memory and start the worker pool"""
+        if problem_factory is None:
+            if fid is None:
+                raise ValueError(f"No problem to evaluate! -> Give a fid or a problem_factory")
+            problem_factory = partial(create_pbo_problem, fid, dimension)
+        super().__init__(dimension, budget, name="ParallelProblem" if fid is None else f"ParallelProblem_F{fid}")
+        self.capacity = capacity    # Maximum number of genomes scored in one go, bigger batches are split
+        self.workers = workers or cpu_count()
+
+        # Shared genome matrix and fitness vector
+        self.__genomes_shm = SharedMemory(create=True, size=capacity * dimension)
+        self.__fitness_shm = SharedMemory(create=True, size=capacity * np.dtype(np.float64).itemsize)
+        self.__genomes = np.ndarray((capacity, dimension), dtype=np.int8, buffer=self.__genomes_shm.buf)
+        self.__fitness = np.ndarray((capacity,), dtype=np.float64, buffer=self.__fitness_shm.buf)
+
+        # Persistent worker pool, every worker creates its own problem
+        self.__pool = Pool(self.workers, initializer=_init_worker,
+                           initargs=(self.__genomes_shm.name, self.__fitness_shm.name, capacity, dimension,
+                                     problem_factory))
+
+        # Release the pool and the shared memory on close() or when the problem is garbage collected
+        self.__finalizer = weakref.finalize(self, _release, self.__pool, [self.__genomes_shm, self.__fitness_shm])
+
+    def _evaluate(self, genomes: list, remaining: int) -> tuple:
+        """Function to evaluate the genomes in parallel, every genome uses one evaluation"""
+        fitness = []
+        for start in range(0, len(genomes), self.capacity):
+            stop = min(start + self.capacity, len(genomes))
+            size = stop - start
+            self.__genomes[:size] = np.array(genomes[start:stop], dtype=np.int8)
+
+            # Split the rows over the workers, only the row ranges are sent
+            bounds = np.linspace(0, size, min(self.workers, size) + 1).astype(int)
+            self.__pool.map(_score_rows, [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])])
+            fitness += self.__fitness[:size].tolist()
+
+        return fitness, len(genomes)
+
+    def close(self):
+        """Function to stop the workers and release the shared memory"""
+        self.__finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
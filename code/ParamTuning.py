@@ -1,90 +1,202 @@
+import os
+import json
+import time
 import numpy as np
 import pandas 
 import optuna
-from optuna.samplers import RandomSampler
+from optuna.samplers import RandomSampler, TPESampler
 from tqdm import tqdm
+from ioh import get_problem, ProblemClass
 
-from s3490750_s3739759_GA import create_problem
 from GeneticAlgorithm import GA
 
-def objective(trial):
+# Categorical search space of the tuneable parameters for every problem
+SEARCH_SPACES = {
+    18: {
+        "P": [10, 20, 36, 50, 76, 100],                             # Size of the genome population
+        "S": ['random selection', 'roulette wheel'],                # Type of selection
+        "C": [0, 0.1, 0.3, 0.5, 0.6, 0.8, 0.95],                    # The propability of doing crossover of two genomes
+        "N": [0, 1, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20],            # The number of slices for n-crossover
+        "M": [0, 0.01, 0.1, 0.33, 0.5],                             # The propability of doing mutation on a bit
+    },
+    19: {
+        "P": [10, 20, 50, 100, 150, 200, 250, 300],
+        "S": ['random selection', 'roulette wheel'],
+        "C": [0, 0.5, 0.6, 0.8, 0.95],
+        "N": [0, 1, 2, 4, 6, 8],
+        "M": [0, 0.01, 0.1, 0.33, 0.5],
+    },
+}
+
+class ResultStore():
+    """Class that memoizes the repetition results of configurations over trials and tuning sessions"""
+    
+    def __init__(self, path="GA-results.json"):
+        """Load the earlier results from the store file if it exists"""
+        self.path = path        # JSON file the results are stored in
+        self.results = {}       # Dictionary of configuration key to the list of repetition results
+        self.reused = 0         # Number of repetitions that were taken from the store
+        self.computed = 0       # Number of repetitions that had to be run
+        self.saved_seconds = 0  # Compute time of the reused repetitions
+        
+        if os.path.exists(path):
+            with open(path) as f:
+                self.results = json.load(f)
+    
+    def key(self, problem, dimension, budget, params, seed) -> str:
+        """Function to create the key of a configuration, repetition i is run with random seed seed+i"""
+        return json.dumps([problem, dimension, budget, list(params), f"seed+i:{seed}"])
+    
+    def get(self, key, repetitions) -> list:
+        """Function to get at most the given number of stored repetition results of a configuration"""
+        stored = self.results.get(key, [])[:repetitions]
+        self.reused += len(stored)
+        self.saved_seconds += sum(result["seconds"] for result in stored)
+        
+        return stored
+    
+    def add(self, key, result):
+        """Function to add the result of the next repetition of a configuration and save the store"""
+        self.results.setdefault(key, []).append(result)
+        self.computed += 1
+        with open(self.path, "w") as f:
+            json.dump(self.results, f)
+    
+    def report(self) -> str:
+        """Function to report how much compute the reuse saved"""
+        total = self.reused + self.computed
+        return (f"Reused {self.reused} of {total} repetitions from {self.path}, "
+                f"saving about {self.saved_seconds:.0f} seconds of compute")
+
+def objective(trial, problem=19, space=None, store=None, seed=1):
     """ Non tuneable parameters """
     budget = 5000
     dimension = 50
     repetitions = 5
-    problem = 19
     
     """ Tuneable parameters """
-    if problem == 18:
-        # Size of the genome population
-        P = trial.suggest_categorical("P", [10, 20, 36, 50, 76, 100])  
-        
-        # Type of selection
-        S = trial.suggest_categorical("S", ['random selection', 'roulette wheel'])        
+    if space is None:
+        space = SEARCH_SPACES[problem]
+    
+    # Size of the genome population
+    P = trial.suggest_categorical("P", space["P"])
+    
+    # Type of selection
+    S = trial.suggest_categorical("S", space["S"])        
 
-        # The propability of doing crossover of two genomes, if 0 don't use crossover
-        C = trial.suggest_categorical("C", [0, 0.1, 0.3, 0.5, 0.6, 0.8, 0.95])    
-       
-        # The number of slices for n-crossover, if 0 use uniform crossover
-        if C>0:
-            N = trial.suggest_categorical("N", [0, 1, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20])
-        else:
-            N = None    
+    # The propability of doing crossover of two genomes, if 0 don't use crossover
+    C = trial.suggest_categorical("C", space["C"])    
+   
+    # The number of slices for n-crossover, if 0 use uniform crossover
+    if C>0:
+        N = trial.suggest_categorical("N", space["N"])
+    else:
+        N = None    
 
-        # The propability of doing mutation on a bit of a genome, if 0 don't use mutation
-        M = trial.suggest_categorical("M", [0, 0.01, 0.1, 0.33, 0.5])
+    # The propability of doing mutation on a bit of a genome, if 0 don't use mutation
+    M = trial.suggest_categorical("M", space["M"])
 
-    if problem == 19:
-        # Size of the genome population
-        P = trial.suggest_categorical("P", [10, 20, 50, 100, 150, 200, 250, 300])
+    # Reuse the repetitions of this configuration that were already run
+    if store is None:
+        store = ResultStore()
+    key = store.key(problem, dimension, budget, (P, S, C, N, M), seed)
+    best_fitness = [result["fitness"] for result in store.get(key, repetitions)]
+    
+    # Only run the missing repetitions
+    if len(best_fitness) < repetitions:
+        # No logger is attached, tuning trials only need the best fitness and should not write run data
+        F = get_problem(problem, dimension=dimension, instance=1, problem_class=ProblemClass.PBO)
+        for rep in tqdm(range(len(best_fitness), repetitions), desc="Loading..."):
+            np.random.seed(seed + rep)
+            start = time.time()
+            model = GA(F, budget, dimension)
+            model.setparameters(P, S, C, N, M)
+            model.main()
+            best_fitness.append(model.best_fitness)
+            store.add(key, {"fitness": float(model.best_fitness), "seconds": time.time() - start})
+            F.reset()
+    
+    return np.average(best_fitness)
+    
+def load_history(problem):
+    """Load the completed trials of an earlier study of the problem as (params, value) pairs"""
+    history = pandas.read_csv(f'GA{problem}-study.csv')
+    history = history[history['state'] == 'COMPLETE']
+    
+    trials = []
+    for _, row in history.iterrows():
+        params = {"P": int(row['params_P']), "S": row['params_S'], "C": float(row['params_C']), "M": float(row['params_M'])}
+        # N is only suggested when crossover is used
+        if params["C"] > 0 and pandas.notna(row['params_N']):
+            params["N"] = int(row['params_N'])
+        trials.append((params, float(row['value'])))
         
-        # Type of selection
-        S = trial.suggest_categorical("S", ['random selection', 'roulette wheel'])        
-
-        # The propability of doing crossover of two genomes, if 0 don't use crossover
-        C = trial.suggest_categorical("C", [0, 0.5, 0.6, 0.8, 0.95])    
-       
-        # The number of slices for n-crossover, if 0 use uniform crossover
-        if C>0: 
-            N = trial.suggest_categorical("N", [0, 1, 2, 4, 6, 8])        
-        else: 
-            N = None               
-
-        # The propability of doing mutation on a bit of a genome, if 0 don't use mutation
-        M = trial.suggest_categorical("M", [0, 0.01, 0.1, 0.33, 0.5])         
+    return trials
 
-    # Keep track of best fitness
-    best_fitness = []
-    best_genomes = []
+def prune_space(space, history, min_trials=5):
+    """Remove the choices of every parameter that are dominated in the history
+    
+    A choice is dominated if it was tried at least min_trials times and even its best value
+    is lower than the average value of the best choice of that parameter"""
+    pruned = {}
+    for name, choices in space.items():
+        values = {choice: [value for params, value in history if params.get(name) == choice] for choice in choices}
+        averages = [np.average(v) for v in values.values() if len(v) >= min_trials]
+        if len(averages) == 0:
+            pruned[name] = list(choices)
+            continue
+        
+        best_average = max(averages)
+        pruned[name] = [choice for choice in choices if len(values[choice]) < min_trials or max(values[choice]) >= best_average]
+        
+    return pruned
 
-    # Run repetitions
-    F, _logger = create_problem(problem, dimension)
-    for _ in tqdm(range(repetitions), desc="Loading..."):
-    # for _ in range(repetitions): 
-        model = GA(F, budget, dimension)
-        model.setparameters(P, S, C, N, M)
-        model.main()
-        best_fitness.append(model.best_fitness)
-        best_genomes.append(model.best_genome)
-        F.reset()
-    _logger.close()
+def warm_start(study, space, history):
+    """Add the history trials that lie in the search space to the study as prior trials"""
+    distributions = {name: optuna.distributions.CategoricalDistribution(choices) for name, choices in space.items()}
     
-    return np.average(best_fitness)
+    trials = []
+    for params, value in history:
+        if not all(params[name] in space[name] for name in params):
+            continue
+        # Use the exact choice objects of the search space, e.g. 0 instead of 0.0
+        params = {name: space[name][space[name].index(params[name])] for name in params}
+        trials.append(optuna.trial.create_trial(params=params, distributions={name: distributions[name] for name in params},
+                                                  value=value, user_attrs={"prior": True}))
+    study.add_trials(trials)
     
-def tune(total_trials):
+    return len(trials)
+
+def tune(total_trials, problem=19, warm=True):
     print("--- Started Tuning ---")
     
     # Creating optuna study
     study_name = "GA-study"
     storage_name = "{}.csv".format(study_name)
-    study = optuna.create_study(sampler=RandomSampler(), direction="maximize", study_name=study_name)
     
-    # Optimize the objective function
+    # Warm start a model based sampler from the earlier study, otherwise start from scratch with random sampling
+    space = SEARCH_SPACES[problem]
+    if warm:
+        history = load_history(problem)
+        space = prune_space(space, history)
+        study = optuna.create_study(sampler=TPESampler(), direction="maximize", study_name=study_name)
+        print(f"Added {warm_start(study, space, history)} prior trials of {len(history)} from GA{problem}-study.csv")
+    else:
+        study = optuna.create_study(sampler=RandomSampler(), direction="maximize", study_name=study_name)
+    
+    # Optimize the objective function, reusing the results of configurations that were already run
+    store = ResultStore()
     for _ in range(total_trials):
-        study.optimize(objective, n_trials=1)
+        study.optimize(lambda trial: objective(trial, problem, space, store), n_trials=1)
+    print(store.report())
 
-    # Save results of study
+    # Save results of study, without the prior trials
     results = study.trials_dataframe()
+    results = results.drop(columns=[c for c in results.columns if c.startswith('system_attrs')])
+    if 'user_attrs_prior' in results:
+        results = results[results['user_attrs_prior'].isna()].drop(columns=['user_attrs_prior'])
+        results = results.reset_index(drop=True)
+        results['number'] = range(len(results))
     results.to_csv(storage_name)
     
     return results
@@ -4,6 +4,8 @@ import numpy as np
 # https://pypi.org/project/ioh/
 from ioh import get_problem, logger, ProblemClass
 
+from BatchProblem import FailedFitness
+
 # TODO 1: Implement random search over the hyperparameters of the evolutionary strategy
 
 budget = 5000
@@ -22,7 +24,11 @@ def set_hyper_parameters(problem_id: int):
             "threshold_divisor": 3,
             "initial_mutation_rate": 1.0,
             "mutation_increase": 1.4,
-            "mutation_decay": 0.99
+            "mutation_decay": 0.99,
+            "lambda_increase": 2,
+            "archive_size": 10,
+            "elite_fraction": 0.2,
+            "restart_policy": "elite"
         }
     elif problem_id == 19:
         # Set hyperparameters specific to problem F19
@@ -33,7 +39,11 @@ def set_hyper_parameters(problem_id: int):
             "threshold_divisor": 10,
             "initial_mutation_rate": 1.0,
             "mutation_increase": 1.1,
-            "mutation_decay": 0.99
+            "mutation_decay": 0.99,
+            "lambda_increase": 2,
+            "archive_size": 20,
+            "elite_fraction": 0.2,
+            "restart_policy": "elite"
         }
 
 
@@ -63,6 +73,42 @@ def evaluate_fitness(individual, problem, cache):
     return fitness
 
 
+def get_binary_key(individual):
+    """Create the cache key of an individual from the binary representation of its genes, same key as evaluate_fitness."""
+    binary_genes = np.where(individual[0] > 0, 1, 0).astype(int).tolist()
+    return get_individual_key([binary_genes])
+
+
+def update_archive(archive, population, cache, archive_size):
+    """Add the evaluated individuals of the population to the elite archive and keep only the best ones."""
+    for individual in population:
+        key = get_binary_key(individual)
+        if key in cache and key not in archive:
+            archive[key] = (cache[key], individual)
+    best_keys = sorted(archive, key=lambda k: archive[k][0], reverse=True)[:archive_size]
+    return {key: archive[key] for key in best_keys}
+
+
+def evaluate_batch(binary_population, problem, cache):
+    """Evaluate the fitness of all individuals that are not cached yet in one batch and update the cache.
+
+    Individuals that could not be evaluated get their fallback fitness for this selection, but are not cached."""
+    keys = [get_individual_key(individual.astype(int).tolist()) for individual in binary_population]
+    misses = {}
+    for key, individual in zip(keys, binary_population):
+        if key not in cache and key not in misses:
+            misses[key] = individual.astype(int).tolist()[0]
+
+    results = dict(zip(misses, problem.evaluate_batch(list(misses.values()))))
+    for key, fitness in results.items():
+        if fitness is None:
+            # The budget was used up, same as evaluating one by one
+            return -1
+        if not isinstance(fitness, FailedFitness):
+            cache[key] = fitness
+    return [cache[key] if key in cache else results[key] for key in keys]
+
+
 def initialize_population(num_individuals):
     """Initialize the population with random genes and sigma values."""
     population = []
@@ -94,6 +140,23 @@ def mutate(individual, problem, mutation_rate):
     return np.array([new_genes, new_sigmas])
 
 
+def restart_population(num_individuals, archive, policy, elite_fraction, problem, mutation_rate):
+    """Create the population of a restart, partly seeded from the elite archive depending on the policy.
+
+    'random' ignores the archive, 'elite' copies the best archived individuals and 'mutated_elite' mutates them."""
+    if policy not in ['random', 'elite', 'mutated_elite']:
+        raise ValueError(f"This restart policy is not possible! -> Choose 'random', 'elite' or 'mutated_elite'")
+
+    num_elites = 0 if policy == 'random' else min(int(round(elite_fraction * num_individuals)), len(archive))
+    elites = sorted(archive.values(), key=lambda x: x[0], reverse=True)[:num_elites]
+    elites = [individual for _, individual in elites]
+    if policy == 'mutated_elite':
+        elites = [mutate(individual, problem, mutation_rate) for individual in elites]
+
+    population = list(elites) + list(initialize_population(num_individuals - num_elites))
+    return np.array(population)
+
+
 def recombine(parent1, parent2):
     """Discrete recombination."""
     child_genes, child_sigmas = [], []
@@ -124,12 +187,18 @@ def select(original_population, problem, cache, mu_):
     fitness_evaluations = []
     binary_population = convert_to_binary_representation(original_population)
 
-    for individual in binary_population:
-        # The fitness is evaluated using the binary representation of the genes
-        fitness = evaluate_fitness(individual, problem, cache)
-        if fitness == -1:
+    # Evaluate all cache misses in one batch if the problem supports it
+    if hasattr(problem, 'evaluate_batch'):
+        fitness_evaluations = evaluate_batch(binary_population, problem, cache)
+        if fitness_evaluations == -1:
             return -1
-        fitness_evaluations.append(fitness)
+    else:
+        for individual in binary_population:
+            # The fitness is evaluated using the binary representation of the genes
+            fitness = evaluate_fitness(individual, problem, cache)
+            if fitness == -1:
+                return -1
+            fitness_evaluations.append(fitness)
 
     ranked_population = [ind for _, ind in
                          sorted(zip(fitness_evaluations, original_population), key=lambda x: x[0], reverse=True)]
@@ -137,10 +206,22 @@ def select(original_population, problem, cache, mu_):
     return selected_population
 
 
-def s3490750_s3739759_ES(problem, run, fid):
-    """The main function implementing the evolutionary strategy."""
+def population_diversity(population):
+    """Expected fraction of differing bits between two individuals of the binary representation of the population."""
+    binary_genes = np.array([np.where(individual[0] > 0, 1, 0) for individual in population])
+    p = np.mean(binary_genes, axis=0)  # Frequency of ones for every bit
+    return float(np.mean(2 * p * (1 - p)))
+
+
+def run_ES(problem, fid, target=None, restart_log=None, **overrides):
+    """Generator implementing the evolutionary strategy, yields a record after every generation.
+
+    Keyword arguments override the hyperparameters of the problem, e.g. restart_policy='random'.
+    If a target fitness is given, the run stops as soon as the best fitness reaches the target.
+    On stagnation the ES restarts IPOP-style with a larger lambda, while the fitness cache and the elite archive
+    are kept. If a restart log list is given, a summary of every restart episode is appended to it."""
     # Set hyperparameters
-    params = set_hyper_parameters(fid)
+    params = dict(set_hyper_parameters(fid), **overrides)
     mu_ = params["mu"]
     lambda_ = params["lambda_"]
     stagnation_threshold = params["stagnation_threshold"]
@@ -148,22 +229,24 @@ def s3490750_s3739759_ES(problem, run, fid):
     initial_mutation_rate = params["initial_mutation_rate"]
     mutation_increase = params["mutation_increase"]
     mutation_decay = params["mutation_decay"]
+    lambda_increase = params["lambda_increase"]
+    archive_size = params["archive_size"]
+    elite_fraction = params["elite_fraction"]
+    restart_policy = params["restart_policy"]
 
     population = initialize_population(mu_)
-    cache = initialize_cache()
+    cache = initialize_cache()  # Global cache, kept over all restarts
+    archive = {}  # Elite archive of the best individuals over all restarts
     prev_evaluation_count = 0
     stagnation_count = 0
     mutation_rate = initial_mutation_rate # Initial mutation rate
-    curr_run = run
-    print(f'Run: {curr_run}')
+    generation = 0
+    cache_hits = 0
+    restarts = 0
+    episode = {"restart": 0, "lambda": lambda_, "start_evaluations": 0, "start_best": None,
+               "episode_best": None, "distinct_evaluations": 0}
 
     while problem.state.evaluations < budget:
-        # Print run number if it changes
-        if run is not None:
-            if curr_run != run:
-                curr_run = run
-                print(f'Run: {run}')
-
         # Dynamically adjust mutation rate, sort of convergence velocity based on stagnation
         if stagnation_count >= stagnation_threshold // threshold_divisor:
             mutation_rate *= mutation_increase  # Increase mutation rate
@@ -178,13 +261,49 @@ def s3490750_s3739759_ES(problem, run, fid):
             new_offspring = mutate(recombine(parent1, parent2), problem, mutation_rate)
             offspring.append(new_offspring)
 
+        parents = population
         population = select(offspring, problem, cache, mu_)
         if population == -1:
-            # print(f'Run: {run} reached budget max budget. Stopping...')
+            # The budget ran out during this generation, yield a final record of the evaluations that were made
+            episode["distinct_evaluations"] += len(cache) - prev_evaluation_count
+            yield {
+                "generation": generation + 1,
+                "evaluations": problem.state.evaluations,
+                "best_fitness": problem.state.current_best.y,
+                "cache_hits": cache_hits,
+                "diversity": population_diversity(parents),
+                "restarts": restarts,
+                "lambda": lambda_,
+            }
             break
 
-        # Check for stagnation
+        # Every offspring that did not add a new entry to the cache was a cache hit
         current_evaluation_count = len(cache)
+        cache_hits += lambda_ - (current_evaluation_count - prev_evaluation_count)
+        generation += 1
+
+        # Keep track of the elites and the effectiveness of the current restart episode
+        archive = update_archive(archive, population, cache, archive_size)
+        # Only individuals in the cache were measured, individuals that could not be evaluated are skipped
+        measured = [cache[key] for key in map(get_binary_key, population) if key in cache]
+        if measured and (episode["episode_best"] is None or max(measured) > episode["episode_best"]):
+            episode["episode_best"] = max(measured)
+        episode["distinct_evaluations"] += current_evaluation_count - prev_evaluation_count
+
+        yield {
+            "generation": generation,
+            "evaluations": problem.state.evaluations,
+            "best_fitness": problem.state.current_best.y,
+            "cache_hits": cache_hits,
+            "diversity": population_diversity(population),
+            "restarts": restarts,
+            "lambda": lambda_,
+        }
+
+        if target is not None and problem.state.current_best.y >= target:
+            break
+
+        # Check for stagnation
         if current_evaluation_count == prev_evaluation_count:
             stagnation_count += 1
         else:
@@ -192,13 +311,36 @@ def s3490750_s3739759_ES(problem, run, fid):
             mutation_rate = initial_mutation_rate
         prev_evaluation_count = current_evaluation_count
 
-        # Restart if stagnation is detected
+        # Restart with a larger lambda if stagnation is detected
         if stagnation_count >= stagnation_threshold:
-            print(f'Stagnation detected in run: {run} at {problem.state.evaluations} evaluations. Restarting...')
-            cache = initialize_cache()  # Optionally, clear the cache
-            population = initialize_population(mu_)  # Restart the population
+            if restart_log is not None:
+                restart_log.append(dict(episode, end_evaluations=problem.state.evaluations))
+            restarts += 1
+            lambda_ = int(lambda_ * lambda_increase)
             stagnation_count = 0
             mutation_rate = initial_mutation_rate
+            population = restart_population(mu_, archive, restart_policy, elite_fraction, problem, mutation_rate)
+            episode = {"restart": restarts, "lambda": lambda_, "start_evaluations": problem.state.evaluations,
+                       "start_best": problem.state.current_best.y, "episode_best": None, "distinct_evaluations": 0}
+
+    # Close the last episode
+    if restart_log is not None:
+        restart_log.append(dict(episode, end_evaluations=problem.state.evaluations))
+
+
+def s3490750_s3739759_ES(problem, run, fid, target=None):
+    """The main function implementing the evolutionary strategy."""
+    print(f'Run: {run}')
+    restart_log = []
+    for _ in run_ES(problem, fid, target=target, restart_log=restart_log):
+        pass
+
+    # Report the effectiveness of every restart, a restart is effective if it improved the best fitness
+    for episode in restart_log[1:]:
+        improved = episode["episode_best"] is not None and episode["episode_best"] > episode["start_best"]
+        print(f'Restart {episode["restart"]} in run: {run} at {episode["start_evaluations"]} evaluations '
+              f'(lambda {episode["lambda"]}): {episode["distinct_evaluations"]} distinct evaluations, '
+              f'{"improved" if improved else "no improvement"}')
 
 
 def random_search(problem):
@@ -0,0 +1,143 @@
+import time
+import asyncio
+import numpy as np
+import pytest
+
+from GeneticAlgorithm import GA
+from BatchProblem import FailedFitness
+import s3490750_s3739759_ES as ES
+from AsyncEvaluation import AsyncProblem, MockServer, http_evaluator
+
+# OneMax, the fitness of a genome is its number of ones
+FID = 1
+DIMENSION = 10
+
+
+def genomes(n):
+    """List of n genomes where genome i has i % (DIMENSION + 1) ones"""
+    return [[1] * (i % (DIMENSION + 1)) + [0] * (DIMENSION - i % (DIMENSION + 1)) for i in range(n)]
+
+
+def test_results_in_order():
+    with MockServer(FID, DIMENSION, latency=0.01) as server:
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 100, concurrency=5)
+        assert problem.evaluate_batch(genomes(20)) == [float(i % (DIMENSION + 1)) for i in range(20)]
+        assert problem.state.evaluations == server.evaluations == 20
+        assert problem.state.current_best.y == DIMENSION
+
+
+def test_concurrency_limit():
+    with MockServer(FID, DIMENSION, latency=0.05) as server:
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 100, concurrency=3)
+        problem.evaluate_batch(genomes(12))
+        assert server.max_active == 3
+
+
+def test_failures_are_retried_without_using_budget():
+    with MockServer(FID, DIMENSION, latency=0.01, failure_rate=0.5) as server:
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 100, retries=10, backoff=0.001)
+        assert problem.evaluate_batch(genomes(10)) == [float(i) for i in range(10)]
+        assert problem.state.evaluations == server.evaluations == 10
+
+
+def test_final_failure_gets_fallback():
+    with MockServer(FID, DIMENSION, latency=0.01, failure_rate=1) as server:
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 100, retries=2, backoff=0.001,
+                               fallback=-1)
+        assert problem.evaluate_batch(genomes(4)) == [-1] * 4
+        assert problem.failures == 4
+        assert problem.state.evaluations == server.evaluations == 0
+
+
+def test_timeouts_are_retried_and_counted():
+    with MockServer(FID, DIMENSION, latency=0.2) as server:
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 100, timeout=0.05, retries=1,
+                               backoff=0.001, fallback=-1)
+        assert problem.evaluate_batch(genomes(3)) == [-1] * 3
+        assert problem.state.evaluations == 6
+
+        # The server still makes the evaluations of the requests that timed out
+        time.sleep(0.3)
+        assert server.evaluations == 6
+
+
+def test_timeout_retries_stay_within_budget():
+    with MockServer(FID, DIMENSION, latency=0.2) as server:
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 4, timeout=0.05, retries=3,
+                               backoff=0.001, fallback=-1)
+        problem.evaluate_batch(genomes(3))
+        time.sleep(0.3)
+        assert problem.state.evaluations == server.evaluations == 4
+
+
+def test_budget_stops_exactly():
+    with MockServer(FID, DIMENSION, latency=0.001) as server:
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 7)
+        fitness = problem.evaluate_batch(genomes(10))
+        assert fitness[7:] == [None] * 3 and None not in fitness[:7]
+        assert problem.state.evaluations == server.evaluations == 7
+
+        # A GA run stops at exactly the budget as well
+        problem = AsyncProblem(http_evaluator(server.host, server.port), DIMENSION, 60, concurrency=20)
+        np.random.seed(1)
+        model = GA(problem, 60, DIMENSION)
+        model.setparameters(10, 'roulette wheel', 0.5, 2, 0.1)
+        model.main()
+        assert problem.state.evaluations == 60
+        assert server.evaluations == 67
+
+
+def test_running_event_loop_is_detected():
+    problem = AsyncProblem(http_evaluator("127.0.0.1", 1), DIMENSION, 10)
+
+    async def evaluate_in_loop():
+        problem.evaluate_batch(genomes(1))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(evaluate_in_loop())
+
+
+def test_other_exceptions_are_retried():
+    calls = []
+
+    async def flaky(genome):
+        # Fails on the first call of every genome, e.g. a malformed response
+        calls.append(genome)
+        if calls.count(genome) == 1:
+            raise ValueError("malformed response")
+        return float(sum(genome))
+
+    problem = AsyncProblem(flaky, DIMENSION, 100, retries=1, backoff=0.001)
+    assert problem.evaluate_batch(genomes(5)) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert problem.failures == 0 and problem.state.evaluations == 5
+
+
+def test_fallback_is_not_the_best_and_not_cached():
+    async def broken_ones(genome):
+        # Genomes starting with a one can never be evaluated
+        if genome[0] == 1:
+            raise KeyError("y")
+        return float(sum(genome))
+
+    problem = AsyncProblem(broken_ones, DIMENSION, 100, retries=1, backoff=0.001, fallback=100)
+    fitness = problem.evaluate_batch([[1] * DIMENSION, [0] * DIMENSION])
+    assert fitness == [100, 0] and isinstance(fitness[0], FailedFitness)
+    assert problem.state.current_best.y == 0 and problem.state.evaluations == 1
+
+    # The GA selects with the fallback, but neither caches it nor takes it as the best fitness
+    problem = AsyncProblem(broken_ones, DIMENSION, 200, retries=0, fallback=100)
+    np.random.seed(1)
+    model = GA(problem, 200, DIMENSION)
+    model.setparameters(10, 'roulette wheel', 0.5, 2, 0.1)
+    model.main()
+    assert problem.failures > 0
+    assert not any(genomestr.startswith('1') for genomestr in model.cache)
+    assert model.best_fitness < 100 and problem.state.current_best.y < 100
+
+    # The ES does not cache it either
+    problem = AsyncProblem(broken_ones, DIMENSION, 100, retries=0, fallback=100)
+    cache = {}
+    binary_population = np.array([np.array([[1] * DIMENSION, [0.5] * DIMENSION]),
+                                  np.array([[0] * DIMENSION, [0.5] * DIMENSION])])
+    assert ES.evaluate_batch(binary_population, problem, cache) == [100, 0]
+    assert list(cache) == [str([0] * DIMENSION)]
@@ -0,0 +1,72 @@
+import numpy as np
+from ioh import get_problem, ProblemClass
+
+import Benchmark
+import s3490750_s3739759_ES as ES
+
+# Two hand-made trajectories of (evaluations, best fitness) pairs with a budget of 100
+A = [(10, 1), (50, 3), (100, 4)]
+B = [(20, 2), (100, 2)]
+
+
+def test_hitting_time():
+    assert Benchmark.hitting_time(A, 3) == 50
+    assert Benchmark.hitting_time(A, 0.5) == 10
+    assert Benchmark.hitting_time(B, 3) is None
+
+
+def test_expected_running_time():
+    # Target 2: A hits at 50, B hits at 20 -> (50 + 20) / 2
+    assert Benchmark.expected_running_time([A, B], 2) == 35
+    # Target 3: A hits at 50, B fails and is charged its 100 evaluations -> (50 + 100) / 1
+    assert Benchmark.expected_running_time([A, B], 3) == 150
+    # Target 5: nobody hits
+    assert Benchmark.expected_running_time([A, B], 5) == float('inf')
+
+
+def test_ecdf_and_auc():
+    # Hitting times for targets 2 and 4 -> A: 50, 100 and B: 20, never
+    assert Benchmark.ecdf([A, B], [2, 4], [25, 50, 100]) == [0.25, 0.5, 0.75]
+
+    rows = Benchmark.report([
+        {"algorithm": "X", "fid": 18, "dimension": 2, "seed": 0, "trajectory": A},
+        {"algorithm": "Y", "fid": 18, "dimension": 2, "seed": 0, "trajectory": B},
+    ], 100, targets=[1, 3], n_budgets=4)
+
+    # Hitting times for targets 1 and 3 -> X: 10, 50 and Y: 20, never
+    # Budgets 25, 50, 75, 100 -> X: 0.5, 1, 1, 1 and Y: 0.5, 0.5, 0.5, 0.5
+    assert [row["algorithm"] for row in rows] == ["X", "Y"]
+    assert rows[0]["ecdf"] == [0.5, 1, 1, 1] and rows[0]["auc"] == 0.875
+    assert rows[1]["ecdf"] == [0.5, 0.5, 0.5, 0.5] and rows[1]["auc"] == 0.5
+    assert rows[0]["ert"] == [10, 50]
+    assert rows[1]["ert"] == [20, float('inf')]
+
+
+def test_default_targets():
+    assert Benchmark.default_targets([A, B], n_targets=3) == [2, 3, 4]
+
+
+def test_run_ES_restores_globals():
+    problem = get_problem(19, dimension=10, instance=1, problem_class=ProblemClass.PBO)
+    np.random.seed(1)
+    records = Benchmark.run_ES(problem, 200, 10, 19)
+    assert records[-1]["evaluations"] == 200
+    assert (ES.budget, ES.dimension) == (5000, 50)
+
+
+def test_tracked_problem_records_every_improvement_within_budget():
+    problem = get_problem(1, dimension=4, instance=1, problem_class=ProblemClass.PBO)
+    tracked = Benchmark.TrackedProblem(problem, 5)
+    for genome in [[1, 0, 0, 0], [0, 0, 0, 0], [1, 1, 0, 0], [1, 1, 0, 0], [1, 1, 1, 0], [1, 1, 1, 1]]:
+        tracked(genome)
+    # The sixth evaluation is past the budget and the optimum it found does not count
+    assert tracked.result() == [(1, 1), (3, 2), (5, 3), (5, 3)]
+    assert tracked.state.evaluations == 6 and tracked.meta_data.n_variables == 4
+
+
+def test_trajectories_stay_within_budget():
+    # The GA evaluates whole generations, so it overshoots the budget in its last generation
+    trajectories = Benchmark.collect_trajectories(["GA", "ES"], [19], [10], [1], 150)
+    for trajectory in trajectories:
+        evaluations = [evaluations for evaluations, _ in trajectory["trajectory"]]
+        assert evaluations == sorted(evaluations) and evaluations[-1] == 150
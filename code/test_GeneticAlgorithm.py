@@ -0,0 +1,32 @@
+import numpy as np
+from ioh import get_problem, ProblemClass
+
+from GeneticAlgorithm import GA
+
+DIMENSION = 50
+KEYS = {"generation", "evaluations", "best_fitness", "cache_hits", "diversity"}
+
+
+def run(budget, target=None):
+    problem = get_problem(19, dimension=DIMENSION, instance=1, problem_class=ProblemClass.PBO)
+    np.random.seed(1)
+    model = GA(problem, budget, DIMENSION)
+    model.setparameters(40, 'roulette wheel', 0.2, 4, 0)
+    return list(model.run(target=target))
+
+
+def test_records():
+    records = run(2000)
+    assert all(set(record) == KEYS for record in records)
+    assert [record["generation"] for record in records] == list(range(1, len(records) + 1))
+    evaluations = [record["evaluations"] for record in records]
+    assert evaluations == sorted(evaluations)
+    best = [record["best_fitness"] for record in records]
+    assert best == sorted(best)
+
+
+def test_target_stops_at_the_first_hit():
+    target = run(2000)[-1]["best_fitness"] * 0.9
+    records = run(2000, target=target)
+    assert records[-1]["best_fitness"] >= target
+    assert all(record["best_fitness"] < target for record in records[:-1])
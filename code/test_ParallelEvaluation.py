@@ -0,0 +1,98 @@
+import gc
+import glob
+import numpy as np
+import pytest
+from ioh import get_problem, logger, ProblemClass
+
+from GeneticAlgorithm import GA
+from ParallelEvaluation import ParallelProblem
+import s3490750_s3739759_ES as ES
+
+DIMENSION = 20
+
+
+class CountOnes():
+    """Black-box problem that is not an ioh problem, the fitness of a genome is its number of ones"""
+
+    def __call__(self, genome):
+        return float(sum(genome))
+
+
+def random_genomes(n):
+    return np.random.randint(0, 2, size=(n, DIMENSION)).tolist()
+
+
+def test_matches_serial_ioh_with_batches_bigger_than_capacity():
+    np.random.seed(1)
+    genomes = random_genomes(30)
+    serial = get_problem(18, dimension=DIMENSION, instance=1, problem_class=ProblemClass.PBO)
+    with ParallelProblem(DIMENSION, 100, fid=18, capacity=7, workers=3) as problem:
+        fitness = problem.evaluate_batch(genomes)
+        assert fitness == [serial(genome) for genome in genomes]
+        assert problem.state.evaluations == 30
+        assert problem.state.current_best.y == max(fitness)
+
+
+def test_genomes_past_budget_get_none_and_are_not_cached():
+    np.random.seed(1)
+    with ParallelProblem(DIMENSION, 5, fid=19, workers=2) as problem:
+        fitness = problem.evaluate_batch(random_genomes(8))
+        assert None not in fitness[:5] and fitness[5:] == [None] * 3
+        assert problem.state.evaluations == 5
+
+    with ParallelProblem(DIMENSION, 50, fid=19, workers=2) as problem:
+        model = GA(problem, 50, DIMENSION)
+        model.setparameters(10, 'roulette wheel', 0.5, 2, 0.1)
+        model.main()
+        # Every cache entry is one counted evaluation
+        assert problem.state.evaluations == len(model.cache) == 50
+
+
+def test_GA_and_ES_stop_at_exactly_the_budget(monkeypatch):
+    monkeypatch.setattr(ES, "dimension", DIMENSION)
+    with ParallelProblem(DIMENSION, 300, fid=19, workers=2) as problem:
+        np.random.seed(1)
+        model = GA(problem, 300, DIMENSION)
+        model.setparameters(20, 'roulette wheel', 0.2, 4, 0)
+        records = list(model.run())
+        assert records[-1]["evaluations"] == problem.state.evaluations == 300
+
+        problem.reset()
+        np.random.seed(1)
+        records = list(ES.run_ES(problem, 19))
+        assert records[-1]["evaluations"] == problem.state.evaluations == 300
+
+
+def test_custom_problem_factory():
+    with ParallelProblem(DIMENSION, 100, problem_factory=CountOnes, workers=2) as problem:
+        genomes = [[1] * i + [0] * (DIMENSION - i) for i in range(DIMENSION + 1)]
+        assert problem.evaluate_batch(genomes) == [float(i) for i in range(DIMENSION + 1)]
+
+    with pytest.raises(ValueError):
+        ParallelProblem(DIMENSION, 100)
+
+
+def test_logger_sees_every_counted_evaluation(tmp_path):
+    np.random.seed(1)
+    genomes = random_genomes(10)
+    l = logger.Analyzer(triggers=[logger.trigger.ALWAYS], root=str(tmp_path), folder_name="run",
+                        algorithm_name="parallel")
+    with ParallelProblem(DIMENSION, 8, fid=19, capacity=3, workers=2) as problem:
+        problem.attach_logger(l)
+        fitness = problem.evaluate_batch(genomes)
+        problem.reset()
+    l.close()
+
+    # One line per evaluation, in the order of the genomes
+    with open(glob.glob(str(tmp_path / "run" / "*" / "*.dat"))[0]) as f:
+        lines = [line.split() for line in f.read().splitlines()[1:]]
+    assert [int(line[0]) for line in lines] == list(range(1, 9))
+    assert [float(line[1]) for line in lines] == fitness[:8]
+
+
+def test_resources_are_released_on_garbage_collection():
+    problem = ParallelProblem(DIMENSION, 10, fid=19, workers=1)
+    finalizer = problem._ParallelProblem__finalizer
+    del problem
+    gc.collect()
+    assert not finalizer.alive
@@ -0,0 +1,97 @@
+from itertools import islice
+import numpy as np
+from ioh import get_problem, ProblemClass
+
+import s3490750_s3739759_ES as ES
+
+
+def individual(genes):
+    """Individual with the given genes and sigmas of one"""
+    return np.array([np.array(genes, dtype=float), np.ones(len(genes))])
+
+
+def test_binary_key_is_the_cache_key():
+    np.random.seed(1)
+    problem = get_problem(1, dimension=5, instance=1, problem_class=ProblemClass.PBO)
+    real = individual(np.random.uniform(-1, 1, 5))
+    cache = {}
+    ES.evaluate_fitness(ES.convert_to_binary_representation([real])[0], problem, cache)
+    assert list(cache) == [ES.get_binary_key(real)]
+
+
+def test_archive_keeps_the_best_individuals():
+    population = [individual([1 if bit == '1' else -1 for bit in f"{i:04b}"]) for i in range(16)]
+    cache = {ES.get_binary_key(ind): float(i) for i, ind in enumerate(population)}
+
+    archive = {}
+    for start in range(0, 16, 4):
+        archive = ES.update_archive(archive, population[start:start + 4], cache, 5)
+        assert len(archive) <= 5
+    assert sorted(fitness for fitness, _ in archive.values()) == [11.0, 12.0, 13.0, 14.0, 15.0]
+
+    # Individuals that were not measured are not archived
+    assert ES.update_archive({}, population, {}, 5) == {}
+
+
+def test_restart_policies_seed_the_elites(monkeypatch):
+    monkeypatch.setattr(ES, "dimension", 4)
+    problem = get_problem(1, dimension=4, instance=1, problem_class=ProblemClass.PBO)
+    population = [individual([1 if bit == '1' else -1 for bit in f"{i:04b}"]) for i in range(16)]
+    cache = {ES.get_binary_key(ind): float(i) for i, ind in enumerate(population)}
+    archive = ES.update_archive({}, population, cache, 10)
+    best = [archive_individual for _, archive_individual in sorted(archive.values(), key=lambda x: x[0], reverse=True)]
+
+    np.random.seed(1)
+    restarted = ES.restart_population(20, archive, 'elite', 0.2, problem, 1.0)
+    assert len(restarted) == 20
+    assert all(np.array_equal(restarted[i], best[i]) for i in range(4))
+    assert not any(np.array_equal(restarted[4], elite) for elite in best)
+
+    restarted = ES.restart_population(20, archive, 'mutated_elite', 0.2, problem, 1.0)
+    assert len(restarted) == 20
+    assert not any(np.array_equal(restarted[i], best[i]) for i in range(4))
+
+    restarted = ES.restart_population(20, archive, 'random', 0.2, problem, 1.0)
+    assert not any(np.array_equal(ind, elite) for ind in restarted for elite in best)
+
+    # There can not be more elites than archived individuals
+    restarted = ES.restart_population(20, dict(list(archive.items())[:2]), 'elite', 0.5, problem, 1.0)
+    assert all(np.array_equal(restarted[i], best[i]) for i in range(2))
+
+
+def test_restarts_double_lambda_and_keep_the_cache(monkeypatch):
+    # With 3 bits there are only 8 genomes, so every generation soon stagnates and forces a restart
+    monkeypatch.setattr(ES, "dimension", 3)
+    problem = get_problem(1, dimension=3, instance=1, problem_class=ProblemClass.PBO)
+    np.random.seed(1)
+    records = list(islice(ES.run_ES(problem, 19, mu=2, lambda_=4, stagnation_threshold=1, threshold_divisor=1), 8))
+
+    assert records[-1]["restarts"] >= 2
+    assert all(record["lambda"] == 4 * 2 ** record["restarts"] for record in records)
+    # The cache is kept over the restarts, so no genome is evaluated twice
+    assert problem.state.evaluations <= 8
+
+
+def run(monkeypatch, budget, target=None):
+    monkeypatch.setattr(ES, "budget", budget)
+    monkeypatch.setattr(ES, "dimension", 50)
+    problem = get_problem(19, dimension=50, instance=1, problem_class=ProblemClass.PBO)
+    np.random.seed(1)
+    return list(ES.run_ES(problem, 19, target=target))
+
+
+def test_records(monkeypatch):
+    records = run(monkeypatch, 1000)
+    keys = {"generation", "evaluations", "best_fitness", "cache_hits", "diversity", "restarts", "lambda"}
+    assert all(set(record) == keys for record in records)
+    evaluations = [record["evaluations"] for record in records]
+    assert evaluations == sorted(evaluations)
+    # The final record is yielded when the budget runs out during a generation
+    assert records[-1]["evaluations"] == 1000
+
+
+def test_target_stops_at_the_first_hit(monkeypatch):
+    target = run(monkeypatch, 1000)[-1]["best_fitness"] * 0.9
+    records = run(monkeypatch, 1000, target=target)
+    assert records[-1]["best_fitness"] >= target
+    assert all(record["best_fitness"] < target for record in records[:-1])